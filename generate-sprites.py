@@ -2,8 +2,14 @@
 
 import argparse
 import importlib
+import multiprocessing
+import os
 import sys
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
 from pathlib import Path
 
 from tqdm import tqdm
@@ -13,26 +19,39 @@ from tqdm import tqdm
 # Interactive sprite selection
 # ---------------------------------------------------------------------------
 
+META_KEYS = ("__files__", "__count__")
+
+
 def build_tree(files: list[Path]) -> dict:
-    """Build a nested tree from file stems, splitting on '_' and dropping the last part."""
-    tree: dict = {}
+    """Build a nested tree from file stems, splitting on '_' and dropping the last part.
+
+    Every node carries a "__count__" of the files beneath it.
+    """
+    tree: dict = {"__count__": 0}
+    setdefault = dict.setdefault
     for f in files:
-        parts = f.stem.split("_")[:-1]
+        parts = f.stem.split("_")
+        parts.pop()
         d = tree
+        d["__count__"] += 1
         for part in parts:
-            d = d.setdefault(part, {})
-        d.setdefault("__files__", []).append(f)
+            d = setdefault(d, part, {"__count__": 0})
+            d["__count__"] += 1
+        setdefault(d, "__files__", []).append(f)
     return tree
 
 
 def collect_all(node: dict) -> list[Path]:
-    """Recursively collect all Path objects under a tree node."""
+    """Collect all Path objects under a tree node."""
     result: list[Path] = []
-    for key, val in node.items():
-        if key == "__files__":
-            result.extend(val)
-        else:
-            result.extend(collect_all(val))
+    extend = result.extend
+    stack = [node]
+    while stack:
+        for key, val in stack.pop().items():
+            if key == "__files__":
+                extend(val)
+            elif key != "__count__":
+                stack.append(val)
     return result
 
 
@@ -42,7 +61,7 @@ def select_sprites(tree: dict, path: list[str] | None = None) -> list[Path]:
         path = []
 
     breadcrumb = " > ".join(path) if path else "root"
-    sub_keys = sorted(k for k in tree if k != "__files__")
+    sub_keys = sorted(k for k in tree if k not in META_KEYS)
     direct_files = tree.get("__files__", [])
 
     # Pure leaf: only direct files, no sub-categories
@@ -51,15 +70,14 @@ def select_sprites(tree: dict, path: list[str] | None = None) -> list[Path]:
         choice = input("  Include all? [Y/n]: ").strip().lower()
         return list(direct_files) if choice in ("", "y", "yes") else []
 
-    total = len(collect_all(tree))
+    total = tree["__count__"]
     print(f"\n[{breadcrumb}]  ({total} files total)")
     if direct_files:
         print(f"  (+ {len(direct_files)} uncategorized files at this level)")
     print()
     print("   0) All")
     for i, key in enumerate(sub_keys, 1):
-        count = len(collect_all(tree[key]))
-        print(f"  {i:2}) {key}  ({count} files)")
+        print(f"  {i:2}) {key}  ({tree[key]['__count__']} files)")
     print()
 
     raw = input("Select (numbers or 0=all, comma/space-separated; Enter=skip): ").strip()
@@ -89,7 +107,7 @@ def select_sprites(tree: dict, path: list[str] | None = None) -> list[Path]:
 
         key = sub_keys[idx - 1]
         subtree = tree[key]
-        sub_sub_keys = [k for k in subtree if k != "__files__"]
+        sub_sub_keys = [k for k in subtree if k not in META_KEYS]
         if sub_sub_keys:
             # Has children — recurse so user can narrow down further
             selected.extend(select_sprites(subtree, path + [key]))
@@ -100,13 +118,23 @@ def select_sprites(tree: dict, path: list[str] | None = None) -> list[Path]:
     return selected
 
 
+def scan_sld_files(graphics_dir: Path) -> dict[Path, int]:
+    """Map every .sld file in graphics_dir to its size in bytes, in a single directory pass."""
+    with os.scandir(graphics_dir) as it:
+        return {
+            Path(e.path): e.stat(follow_symlinks=False).st_size
+            for e in it
+            if e.name.endswith(".sld") and e.is_file(follow_symlinks=False)
+        }
+
+
+_SIZE_FORMATS = ("{:.1f}KB", "{:.1f}MB", "{:.2f}GB")
+
+
 def fmt_size(b: int) -> str:
-    if b < 1024 ** 2:
-        return f"{b / 1024:.1f}KB"
-    elif b < 1024 ** 3:
-        return f"{b / 1024 ** 2:.1f}MB"
-    else:
-        return f"{b / 1024 ** 3:.2f}GB"
+    # Power of 1024 from the bit length: 1=KB, 2=MB, 3=GB (sub-KB sizes shown as KB)
+    power = min(max((b.bit_length() - 1) // 10, 1), 3)
+    return _SIZE_FORMATS[power - 1].format(b / (1 << 10 * power))
 
 
 def load_singlefile(openage_dir: Path):
@@ -117,25 +145,71 @@ def load_singlefile(openage_dir: Path):
     return importlib.import_module("openage.convert.tool.singlefile")
 
 
-_openage_dir: Path | None = None
+_singlefile = None
+_out_dir: Path | None = None
+_warm_up_barrier = None
+
+
+def _init_worker(openage_dir: Path, out_dir: Path, warm_up_barrier):
+    """Load openage once per worker process; it is reused for every file.
 
+    All jobs share the same openage install and output directory, so any
+    state openage sets up on import is valid for every sprite.
+    """
+    global _singlefile, _out_dir, _warm_up_barrier
+    _singlefile = load_singlefile(openage_dir)
+    _out_dir = out_dir
+    _warm_up_barrier = warm_up_barrier
 
-def _init_worker(openage_dir: Path):
-    global _openage_dir
-    _openage_dir = openage_dir
 
+def _warm_up() -> None:
+    """Block until every worker is running a warm-up job.
 
-def convert_file(sld_file: Path, out_dir: Path) -> int:
+    Since no worker can return until all of them have arrived, each of the
+    pool's workers ends up running exactly one of these, after its
+    initializer has finished.
+    """
+    _warm_up_barrier.wait()
+
+
+def convert_file(sld_path: str) -> int:
     """Returns output file size in bytes on success, 0 on failure."""
-    openage_script = load_singlefile(_openage_dir)
-    out_file = out_dir / f"{sld_file.stem}.png"
+    sld_file = Path(sld_path)
+    out_file = _out_dir / f"{sld_file.stem}.png"
     try:
-        openage_script.read_sld_file(sld_file, out_file, compression_level=2, layer=0)
+        _singlefile.read_sld_file(sld_file, out_file, compression_level=2, layer=0)
         return out_file.stat().st_size
     except Exception:
         return 0
 
 
+def convert_files(sld_paths: list[str]) -> list[int]:
+    """Convert a batch of files; one result per path, as from convert_file."""
+    return [convert_file(p) for p in sld_paths]
+
+
+def imap_bounded(executor: Executor, fn, items, max_in_flight: int, chunksize: int = 1) -> Iterator:
+    """Like executor.map, but yields in completion order and keeps at most
+    max_in_flight futures pending instead of submitting everything up front.
+
+    Items are sent in lists of up to `chunksize`; `fn` takes such a list and
+    returns a list of results, which are yielded one by one.
+    """
+    items = iter(items)
+    in_flight: set[Future] = set()
+    while True:
+        while len(in_flight) < max_in_flight:
+            batch = list(islice(items, chunksize))
+            if not batch:
+                break
+            in_flight.add(executor.submit(fn, batch))
+        if not in_flight:
+            return
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from future.result()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Convert .sld graphics to .png sprites using openage")
     parser.add_argument("openage_dir", type=Path, help="Path to the openage directory")
@@ -157,7 +231,8 @@ def main():
 
     args.out_dir.mkdir(parents=True, exist_ok=True)
 
-    sld_files = sorted(graphics_dir.glob("*.sld"))
+    sizes = scan_sld_files(graphics_dir)
+    sld_files = sorted(sizes, key=lambda p: p.name)
     if not sld_files:
         print(f"No .sld files found in {graphics_dir}", file=sys.stderr)
         sys.exit(1)
@@ -170,40 +245,58 @@ def main():
         sys.exit(0)
     print(f"\nSelected {len(sld_files)} file(s).")
 
+    # Largest first, so small files fill the tail instead of one big straggler
+    sld_files.sort(key=sizes.__getitem__, reverse=True)
+    # Plain strings are much cheaper than Path objects to pickle for the workers
+    sld_paths = [os.fspath(f) for f in sld_files]
+
     out_dir = args.out_dir.resolve()
+    n_files = len(sld_files)
     completed = 0
     failed = 0
     bytes_written = 0
 
     print(f"Input:   {graphics_dir}")
     print(f"Output:  {out_dir}")
-    print(f"Total:   {len(sld_files)} .sld files")
+    print(f"Total:   {n_files} .sld files")
     print(f"Workers: {args.workers}")
 
-    with tqdm(total=len(sld_files), unit="file", dynamic_ncols=True) as progress:
-        with ProcessPoolExecutor(
-            max_workers=args.workers,
-            initializer=_init_worker,
-            initargs=(args.openage_dir,),
-        ) as executor:
-            futures = {
-                executor.submit(convert_file, sld_file, out_dir): sld_file
-                for sld_file in sld_files
-            }
-            for future in as_completed(futures):
-                size = future.result()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.openage_dir, out_dir, multiprocessing.Barrier(args.workers)),
+    ) as executor:
+        # Let every worker load openage before the progress bar starts timing
+        done, _ = wait([executor.submit(_warm_up) for _ in range(args.workers)])
+        try:
+            for future in done:
+                future.result()
+        except BrokenProcessPool:
+            print(f"Error: failed to load openage from {bin_dir} in the worker processes",
+                  file=sys.stderr)
+            sys.exit(1)
+
+        with tqdm(total=n_files, unit="file", dynamic_ncols=True,
+                  mininterval=0.1, miniters=16) as progress:
+            last_update = time.monotonic()
+            for size in imap_bounded(executor, convert_files, sld_paths,
+                                     4 * args.workers, chunksize=32):
                 if size > 0:
                     completed += 1
                     bytes_written += size
                 else:
                     failed += 1
-                projected = int(bytes_written / completed * len(sld_files)) if completed > 0 else 0
                 progress.update(1)
-                progress.set_postfix(done=completed, failed=failed,
-                                     size=fmt_size(bytes_written), proj=fmt_size(projected))
+                # Redrawing the postfix is expensive; refresh it at most 10x/sec
+                now = time.monotonic()
+                if now - last_update > 0.1 or completed + failed == n_files:
+                    last_update = now
+                    projected = bytes_written * n_files // completed if completed > 0 else 0
+                    progress.set_postfix(done=completed, failed=failed,
+                                         size=fmt_size(bytes_written), proj=fmt_size(projected))
 
     print(f"Done: {completed} converted, {failed} failed")
-    print(f"Size: {fmt_size(bytes_written)} written  |  projected total: {fmt_size(int(bytes_written / completed * len(sld_files)) if completed else 0)}")
+    print(f"Size: {fmt_size(bytes_written)} written  |  projected total: {fmt_size(bytes_written * n_files // completed if completed else 0)}")
 
 
 if __name__ == "__main__":
@@ -6,6 +6,8 @@ from the AoE2DE tools and patching them for Linux.
 
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
 
 GAME_PATH = Path.home() / ".steam/steam/steamapps/common/AoE2DE"
@@ -14,6 +16,50 @@ PROJECT_DIR = Path(__file__).resolve().parent
 SOURCE_DIR = PROJECT_DIR / "Source"
 
 
+def extract_archive() -> int:
+    """Run 7z, draining its output on a background thread. Returns the exit code."""
+    proc = subprocess.Popen(
+        ["7z", "x", "-bb1", "-bsp0", str(ARCHIVE), f"-o{SOURCE_DIR}"],
+        cwd=PROJECT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=1,
+        text=True,
+        errors="replace",
+    )
+    lines: list[str] = []
+
+    def drain():
+        extracted = 0
+        last_update = time.monotonic()
+        try:
+            for line in proc.stdout:
+                # -bb1 reports each extracted file as "- <path>"
+                if line.startswith("- "):
+                    extracted += 1
+                    # Refresh the counter at most twice a second
+                    now = time.monotonic()
+                    if now - last_update > 0.5:
+                        last_update = now
+                        print(f"\r  {extracted} files extracted", end="", flush=True)
+                else:
+                    lines.append(line)
+            print(f"\r  {extracted} files extracted")
+        finally:
+            # Keep emptying the pipe even if the loop above failed, or 7z
+            # blocks on a full pipe and proc.wait() never returns
+            while proc.stdout.buffer.read(65536):
+                pass
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    returncode = proc.wait()
+    reader.join()
+    if returncode != 0:
+        print("".join(lines), end="")
+    return returncode
+
+
 def main() -> int:
     if not ARCHIVE.exists():
         print(f"Error: archive not found: {ARCHIVE}")
@@ -23,11 +69,7 @@ def main() -> int:
         print(f"Source/ already exists, skipping extraction.")
     else:
         print(f"Extracting {ARCHIVE} ...")
-        result = subprocess.run(
-            ["7z", "x", str(ARCHIVE), f"-o{SOURCE_DIR}"],
-            cwd=PROJECT_DIR,
-        )
-        if result.returncode != 0:
+        if extract_archive() != 0:
             print("Extraction failed.")
             return 1
 
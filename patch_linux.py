@@ -7,37 +7,143 @@ Run from the Source/ directory (or pass --source-dir).
 """
 
 import argparse
+import mmap
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
 
-def patch_file(filepath: Path, anchor: str, insertion: str, label: str) -> bool:
-    """Insert `insertion` after `anchor` in file, if not already present.
+class Patch(NamedTuple):
+    path: str  # relative to the Source/ directory
+    anchor: str
+    insertion: str
+    marker: str  # distinctive substring of `insertion`; if present, already applied
+    label: str
+
+
+PATCHES = (
+    # --- Patch 1: pcrio/pcrio.c — fopen_s compat macro ---
+    Patch(
+        path="pcrio/pcrio.c",
+        anchor='#include "pcrio.h"',
+        insertion=(
+            "\n"
+            "/* Linux compat: MSVC secure CRT functions */\n"
+            "#ifndef _MSC_VER\n"
+            "#define fopen_s(pFile, filename, mode) \\\n"
+            "    ((*(pFile) = fopen((filename), (mode))) == NULL)\n"
+            "#define strncpy_s(dest, destsz, src, count) strncpy((dest), (src), (count))\n"
+            "#define strcpy_s(dest, destsz, src) strcpy((dest), (src))\n"
+            "#endif\n"
+        ),
+        marker="#define fopen_s(pFile",
+        label="pcrio.c MSVC secure CRT compat",
+    ),
+    # --- Patch 2: genieutils CMakeLists.txt — missing source files ---
+    Patch(
+        path="genieutils/CMakeLists.txt",
+        anchor="src/dat/unit/Building.cpp",
+        insertion="    src/dat/unit/TrainLocation.cpp\n    src/dat/ResearchLocation.cpp",
+        marker="src/dat/unit/TrainLocation.cpp",
+        label="genieutils CMakeLists.txt missing sources",
+    ),
+)
 
-    Returns True if patch was applied or already present, False on error.
-    """
-    if not filepath.exists():
-        print(f"  SKIP  {label}: file not found ({filepath})")
-        return False
 
-    text = filepath.read_text()
+def find_insertions(data, patches: list[Patch], log: list[str]) -> tuple[bool, list[tuple[int, Patch]]]:
+    """Locate the insertion offset of every patch not yet present in `data`.
 
+    `data` may be bytes or an mmap; each anchor's first occurrence is used.
+    Status lines are appended to `log`.
+    Returns (ok, [(offset, patch), ...]); ok is False if an anchor was missing.
+    """
     # Already patched?
-    if insertion.strip() in text:
-        print(f"  OK    {label}: already applied")
-        return True
+    pending: list[Patch] = []
+    for patch in patches:
+        if data.find(patch.marker.encode()) != -1:
+            log.append(f"  OK    {patch.label}: already applied")
+        else:
+            pending.append(patch)
+    if not pending:
+        return True, []
 
     # Find anchor
-    idx = text.find(anchor)
-    if idx == -1:
-        print(f"  FAIL  {label}: anchor not found")
-        return False
-
-    insert_pos = idx + len(anchor)
-    patched = text[:insert_pos] + "\n" + insertion + text[insert_pos:]
-    filepath.write_text(patched)
-    print(f"  PATCH {label}: applied")
-    return True
+    ok = True
+    inserts: list[tuple[int, Patch]] = []
+    for patch in pending:
+        anchor = patch.anchor.encode()
+        idx = data.find(anchor)
+        if idx == -1:
+            log.append(f"  FAIL  {patch.label}: anchor not found")
+            ok = False
+        else:
+            inserts.append((idx + len(anchor), patch))
+    return ok, inserts
+
+
+def splice(tail: bytes, offset: int, inserts: list[tuple[int, Patch]], newline: bytes) -> bytes:
+    """Return `tail` (the file contents from `offset` on) with the insertions applied.
+
+    Line breaks in the insertions are written as `newline` to match the file.
+    """
+    parts: list[bytes] = []
+    prev = offset
+    for insert_pos, patch in sorted(inserts, key=lambda i: i[0]):
+        parts.append(tail[prev - offset:insert_pos - offset])
+        parts.append(("\n" + patch.insertion).encode().replace(b"\n", newline))
+        prev = insert_pos
+    parts.append(tail[prev - offset:])
+    return b"".join(parts)
+
+
+def patch_file(filepath: Path, patches: list[Patch]) -> tuple[bool, list[str]]:
+    """Insert each patch's `insertion` after its `anchor` in file, if not already present.
+
+    The file is mapped rather than read, and only the part after the first
+    insertion point is rewritten.
+    Returns (ok, status lines); ok is True if every patch was applied or
+    already present, False on error.
+    """
+    if not filepath.exists():
+        return False, [f"  SKIP  {patch.label}: file not found ({filepath})" for patch in patches]
+    if not filepath.is_file():
+        return False, [f"  SKIP  {patch.label}: not a regular file ({filepath})" for patch in patches]
+
+    log: list[str] = []
+
+    # Read-only until we know something needs writing, so already-patched
+    # read-only trees still pass
+    with filepath.open("rb") as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        # mmap cannot map an empty file
+        data = mmap.mmap(fd, 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            ok, inserts = find_insertions(data, patches, log)
+            if inserts:
+                # Keep CRLF sources CRLF instead of mixing in bare LFs
+                newline = b"\r\n" if data.find(b"\r\n") != -1 else b"\n"
+                offset = min(insert_pos for insert_pos, _ in inserts)
+                tail = os.pread(fd, size - offset, offset)
+                new_tail = memoryview(splice(tail, offset, inserts, newline))
+        finally:
+            if size:
+                data.close()
+
+    if inserts:
+        fd = os.open(filepath, os.O_WRONLY)
+        try:
+            written = 0
+            while written < len(new_tail):
+                written += os.pwrite(fd, new_tail[written:], offset + written)
+        finally:
+            os.close(fd)
+
+    for _, patch in inserts:
+        log.append(f"  PATCH {patch.label}: applied")
+    return ok, log
 
 
 def main() -> int:
@@ -54,30 +160,20 @@ def main() -> int:
     print(f"Source directory: {source}")
     ok = True
 
-    # --- Patch 1: pcrio/pcrio.c — fopen_s compat macro ---
-    ok &= patch_file(
-        filepath=source / "pcrio" / "pcrio.c",
-        anchor='#include "pcrio.h"',
-        insertion=(
-            "\n"
-            "/* Linux compat: MSVC secure CRT functions */\n"
-            "#ifndef _MSC_VER\n"
-            "#define fopen_s(pFile, filename, mode) \\\n"
-            "    ((*(pFile) = fopen((filename), (mode))) == NULL)\n"
-            "#define strncpy_s(dest, destsz, src, count) strncpy((dest), (src), (count))\n"
-            "#define strcpy_s(dest, destsz, src) strcpy((dest), (src))\n"
-            "#endif\n"
-        ),
-        label="pcrio.c MSVC secure CRT compat",
-    )
-
-    # --- Patch 2: genieutils CMakeLists.txt — missing source files ---
-    ok &= patch_file(
-        filepath=source / "genieutils" / "CMakeLists.txt",
-        anchor="src/dat/unit/Building.cpp",
-        insertion="    src/dat/unit/TrainLocation.cpp\n    src/dat/ResearchLocation.cpp",
-        label="genieutils CMakeLists.txt missing sources",
-    )
+    patches_by_file: dict[str, list[Patch]] = {}
+    for patch in PATCHES:
+        patches_by_file.setdefault(patch.path, []).append(patch)
+    # One task per file, so no two threads ever touch the same file
+    workers = min(len(patches_by_file), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, so output follows PATCHES
+        for file_ok, log in executor.map(
+            lambda item: patch_file(source / item[0], item[1]),
+            patches_by_file.items(),
+        ):
+            for line in log:
+                print(line)
+            ok &= file_ok
 
     # Summary
     print()